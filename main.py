@@ -2,11 +2,17 @@
 from __future__ import annotations
 
 import argparse
+import sys
+from functools import lru_cache
+from itertools import chain, cycle, islice, repeat
+from pathlib import Path
 
-from poketcg import Attack, Deck, Player, PokemonCard, PokemonGame
-from poketcg.card_data import PokemonCardClient
+from poketcg import Attack, Deck, GameResult, Player, PokemonCard, PokemonGame
+from poketcg.card_data import DEFAULT_CACHE_PATH, PokemonCardClient
 from poketcg.visualization import CardMetadataResolver, GameVisualizer
 
+REPLAY_DIR = DEFAULT_CACHE_PATH.parent / "replays"
+
 
 def build_demo_deck(name_prefix: str) -> Deck:
     """Create a deterministic 60 card deck for demonstration purposes."""
@@ -21,8 +27,25 @@ def build_demo_deck(name_prefix: str) -> Deck:
         hp=90,
         attacks=[Attack(name="Electro Ball", damage=50)],
     )
-    cards = [pikachu] * 40 + [raichu] * 20
-    return Deck.from_iterable(cards)
+    return Deck.from_iterable(chain(repeat(pikachu, 40), repeat(raichu, 20)))
+
+
+@lru_cache(maxsize=4096)
+def _card_from_remote(card_id: int, name: str) -> PokemonCard:
+    """Return the simulated card for a remote entry.
+
+    ``PokemonCard`` is frozen, so the cached instance is shared by every deck
+    (and every copy within a deck) that references the same card.
+    """
+
+    hp = 60 + (card_id % 5) * 10
+    damage = 20 + (card_id % 4) * 10
+    return PokemonCard(
+        name=name,
+        hp=hp,
+        attacks=[Attack(name="Remote Attack", damage=damage)],
+        external_id=card_id,
+    )
 
 
 def build_remote_deck(client: PokemonCardClient, start: int, end: int) -> Deck:
@@ -32,24 +55,30 @@ def build_remote_deck(client: PokemonCardClient, start: int, end: int) -> Deck:
     if not remotes:
         raise RuntimeError("カードデータが取得できませんでした。別のID範囲を指定してください。")
 
-    cards = []
-    for remote in remotes:
-        hp = 60 + (remote.card_id % 5) * 10
-        damage = 20 + (remote.card_id % 4) * 10
-        cards.append(
-            PokemonCard(
-                name=remote.name,
-                hp=hp,
-                attacks=[Attack(name="Remote Attack", damage=damage)],
-                external_id=remote.card_id,
-            )
-        )
+    cards = [_card_from_remote(remote.card_id, remote.name) for remote in remotes]
 
     # Repeat cards until we reach 60 cards.
-    while len(cards) < 60:
-        cards.extend(cards)
-    cards = cards[:60]
-    return Deck.from_iterable(cards)
+    return Deck.from_iterable(islice(cycle(cards), 60))
+
+
+def run_game(game: PokemonGame, *, max_turns: int, replay_dir: Path | None) -> GameResult:
+    """Play ``game``, reusing a stored recording when the same game was played before."""
+
+    if replay_dir is None:
+        return game.play(max_turns=max_turns)
+    fingerprint = game.fingerprint(max_turns=max_turns)
+    path = replay_dir / f"{fingerprint}.json"
+    if path.exists():
+        try:
+            return PokemonGame.replay(path, fingerprint=fingerprint)
+        except (OSError, ValueError):
+            pass  # Unreadable or stale recording; play again and overwrite it.
+    result = game.play(max_turns=max_turns)
+    try:
+        PokemonGame.save_replay(path, result, fingerprint=fingerprint)
+    except OSError as exc:
+        print(f"Could not save replay to {path}: {exc}", file=sys.stderr)
+    return result
 
 
 def parse_args() -> argparse.Namespace:
@@ -62,43 +91,61 @@ def parse_args() -> argparse.Namespace:
         metavar=("START", "END"),
         help="カードIDの範囲を指定してデッキを生成します。例: --card-range 48000 48100",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"取得したカード情報を {DEFAULT_CACHE_PATH.parent} にキャッシュしません。",
+    )
+    parser.add_argument(
+        "--replay-cache",
+        action="store_true",
+        help=f"試合結果を {REPLAY_DIR} に保存し、同じ試合はシミュレーションせずに再生します。",
+    )
+    parser.add_argument(
+        "--revalidate",
+        action="store_true",
+        help="キャッシュ済みのカード情報が最新か公式サイトに問い合わせます（変更がなければ再取得しません）。",
+    )
     return parser.parse_args()
 
 
 def main() -> None:
     args = parse_args()
-    client: PokemonCardClient | None = None
-
-    if args.card_range:
-        start, end = args.card_range
-        client = PokemonCardClient()
-        deck_one = build_remote_deck(client, start, end)
-        deck_two = build_remote_deck(client, start, end)
-    else:
-        deck_one = build_demo_deck("Player One")
-        deck_two = build_demo_deck("Player Two")
-
-    player_one = Player(name="Ash", deck=deck_one)
-    player_two = Player(name="Gary", deck=deck_two)
-
-    game = PokemonGame(player_one, player_two, seed=42)
-    result = game.play(max_turns=50)
-
-    for line in result.log:
-        print(line)
-
-    if result.winner is None:
-        print("Result: Draw")
-    else:
-        winner_name = game.players[result.winner].name
-        print(f"Result: {winner_name} wins")
-
-    if args.render_html:
-        metadata_client = client or PokemonCardClient()
-        resolver = CardMetadataResolver(metadata_client)
-        visualizer = GameVisualizer(resolver)
-        visualizer.render_html(result.snapshots, args.render_html)
-        print(f"Saved HTML replay to {args.render_html}")
+    cache_path = None if args.no_cache else DEFAULT_CACHE_PATH
+
+    # The client only connects on first use, so creating it up front costs
+    # nothing and guarantees the card cache is flushed however main exits.
+    with PokemonCardClient(cache_path=cache_path, revalidate=args.revalidate) as client:
+        if args.card_range:
+            start, end = args.card_range
+            deck_one = build_remote_deck(client, start, end)
+            deck_two = build_remote_deck(client, start, end)
+        else:
+            deck_one = build_demo_deck("Player One")
+            deck_two = build_demo_deck("Player Two")
+
+        player_one = Player(name="Ash", deck=deck_one)
+        player_two = Player(name="Gary", deck=deck_two)
+
+        game = PokemonGame(player_one, player_two, seed=42)
+        result = run_game(game, max_turns=50, replay_dir=REPLAY_DIR if args.replay_cache else None)
+
+        if result.log:
+            sys.stdout.write("\n".join(result.log))
+            sys.stdout.write("\n")
+
+        if result.winner is None:
+            print("Result: Draw")
+        else:
+            winner_name = game.player(result.winner).name
+            print(f"Result: {winner_name} wins")
+
+        if args.render_html:
+            resolver = CardMetadataResolver(client)
+            # Rendered once, so there is nothing to gain from caching snapshot HTML.
+            visualizer = GameVisualizer(resolver, snapshot_cache_size=0)
+            visualizer.render_html(result.snapshots, args.render_html)
+            print(f"Saved HTML replay to {args.render_html}")
 
 
 if __name__ == "__main__":
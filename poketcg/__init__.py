@@ -3,7 +3,7 @@
 from .cards import Attack, PokemonCard, EnergyCard, TrainerCard
 from .deck import Deck
 from .player import Player
-from .game import PokemonGame, GameResult, GameSnapshot, PlayerSnapshot
+from .game import PokemonGame, GameResult, GameSnapshot, PlayerSnapshot, SnapshotTimeline
 from .card_data import PokemonCardClient, RemoteCard
 from .visualization import CardMetadataResolver, GameVisualizer
 
@@ -18,6 +18,7 @@ __all__ = [
     "GameResult",
     "GameSnapshot",
     "PlayerSnapshot",
+    "SnapshotTimeline",
     "PokemonCardClient",
     "RemoteCard",
     "CardMetadataResolver",
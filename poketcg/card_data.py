@@ -1,13 +1,41 @@
 """Utilities for retrieving Pokemon card metadata from the official database."""
 from __future__ import annotations
 
+import base64
+import dbm
+import pickle
+import re
+import shelve
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
-from html.parser import HTMLParser
-from typing import Dict, Iterable, List
-from urllib.error import URLError
-from urllib.request import urlopen
+from html import unescape
+from http.client import HTTPConnection, HTTPException, HTTPResponse, HTTPSConnection
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.error import HTTPError, URLError
+from urllib.parse import SplitResult, unquote, urljoin, urlsplit
+from urllib.request import getproxies, proxy_bypass
 
 DETAIL_URL_TEMPLATE = "https://www.pokemon-card.com/card-search/details.php/card/{card_id}"
+MAX_WORKERS = 16
+READ_CHUNK_SIZE = 4096
+HEAD_FALLBACK_SIZE = 16 * 1024
+# Reading stops at ``</head>``, so a connection can only be reused once the
+# rest of the body has been drained. Remainders up to this size are drained;
+# larger ones cost more to download than the handshake they would save, so
+# their connection is closed instead. Pooling therefore only pays off for
+# detail pages whose body after ``</head>`` fits within this limit.
+DRAIN_LIMIT = 64 * 1024
+MAX_REDIRECTS = 5
+USER_AGENT = "poketcg"
+DEFAULT_CACHE_PATH = Path.home() / ".cache" / "poketcg" / "cards.db"
+
+_HEAD_RE = re.compile(rb"<head\b[^>]*>(.*?)</head\s*>", re.I | re.S)
+_HEAD_END_RE = re.compile(rb"</head\s*>", re.I)
+# Quoted runs are skipped as a whole so a ``>`` inside a value does not end the tag.
+_META_RE = re.compile(rb"""<meta\b((?:[^>"']|"[^"]*"|'[^']*')*)>""", re.I)
+_ATTR_RE = re.compile(rb"""([a-zA-Z_:][-\w:.]*)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>][^\s>]*))""")
 
 
 @dataclass(frozen=True)
@@ -20,67 +48,381 @@ class RemoteCard:
     image_url: str
 
 
-class _MetaTagParser(HTMLParser):
-    """Minimal parser that extracts meta tag properties."""
+@dataclass(frozen=True)
+class _CacheEntry:
+    """Persisted card together with the HTTP validators of the page it came from."""
+
+    card: RemoteCard
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
 
-    def __init__(self) -> None:
-        super().__init__()
-        self.meta: Dict[str, str] = {}
 
-    def handle_starttag(self, tag: str, attrs):  # type: ignore[override]
-        if tag.lower() != "meta":
-            return
-        attr_dict = {key.lower(): value for key, value in attrs if value is not None}
-        prop = attr_dict.get("property") or attr_dict.get("name")
-        content = attr_dict.get("content")
+@dataclass(frozen=True)
+class _Page:
+    """Result of downloading a detail page. ``body`` is ``None`` on ``304 Not Modified``."""
+
+    body: Optional[bytes]
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+
+def _extract_meta(page: bytes) -> Dict[str, str]:
+    """Return the ``property``/``name`` to ``content`` mapping of ``page``'s meta tags.
+
+    Only the ``<head>`` section is scanned (or the first
+    :data:`HEAD_FALLBACK_SIZE` bytes when no head is present), and values are
+    decoded individually so the rest of the document is never turned into
+    text.
+    """
+
+    match = _HEAD_RE.search(page)
+    head = match.group(1) if match else page[:HEAD_FALLBACK_SIZE]
+    meta: Dict[str, str] = {}
+    for tag_attrs in _META_RE.findall(head):
+        attrs = {
+            key.lower(): double or single or unquoted
+            for key, double, single, unquoted in _ATTR_RE.findall(tag_attrs)
+        }
+        prop = attrs.get(b"property") or attrs.get(b"name")
+        content = attrs.get(b"content")
         if prop and content:
-            self.meta[prop] = content
+            meta[unescape(prop.decode("utf-8", errors="ignore"))] = unescape(content.decode("utf-8", errors="ignore"))
+    return meta
+
+
+class _ConnectionPool:
+    """Keep-alive HTTP(S) connections shared by the client's worker threads.
+
+    Idle connections are kept per ``(scheme, host)`` so consecutive requests
+    to the card database reuse an established TCP/TLS session instead of
+    paying for a new handshake each time. Proxies are taken from the
+    environment (``https_proxy``, ``http_proxy``, ``no_proxy``) as
+    :func:`urllib.request.urlopen` would: HTTPS is tunnelled with ``CONNECT``
+    and plain HTTP is forwarded with absolute request targets.
+    """
+
+    def __init__(self, *, timeout: float, maxsize: int, proxies: Optional[Dict[str, str]] = None):
+        self.timeout = timeout
+        self.maxsize = maxsize
+        self.proxies = getproxies() if proxies is None else proxies
+        self._idle: Dict[Tuple[str, str], List[HTTPConnection]] = {}
+        self._lock = threading.Lock()
+
+    def _proxy(self, scheme: str, host: str) -> Optional[SplitResult]:
+        proxy = self.proxies.get(scheme)
+        if not proxy or proxy_bypass(host):
+            return None
+        return urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+
+    @staticmethod
+    def _proxy_headers(proxy: SplitResult) -> Dict[str, str]:
+        if proxy.username is None:
+            return {}
+        credentials = f"{unquote(proxy.username)}:{unquote(proxy.password or '')}"
+        return {"Proxy-Authorization": "Basic " + base64.b64encode(credentials.encode("utf-8")).decode("ascii")}
+
+    def prepare(self, scheme: str, host: str, target: str, headers: Dict[str, str]) -> Tuple[str, Dict[str, str]]:
+        """Return the request target and headers to send for ``target`` on ``host``."""
+
+        proxy = self._proxy(scheme, host) if scheme != "https" else None
+        if proxy is None:
+            return target, headers
+        return f"{scheme}://{host}{target}", {**headers, **self._proxy_headers(proxy)}
+
+    def acquire(self, scheme: str, host: str, *, fresh: bool = False) -> Tuple[HTTPConnection, bool]:
+        """Return a connection and whether it was reused from the idle pool."""
+
+        if not fresh:
+            with self._lock:
+                idle = self._idle.get((scheme, host))
+                if idle:
+                    return idle.pop(), True
+        factory = HTTPSConnection if scheme == "https" else HTTPConnection
+        proxy = self._proxy(scheme, host)
+        if proxy is None:
+            return factory(host, timeout=self.timeout), False
+        connection = factory(proxy.hostname, proxy.port, timeout=self.timeout)
+        if scheme == "https":
+            connection.set_tunnel(host, headers=self._proxy_headers(proxy))
+        return connection, False
+
+    def release(self, scheme: str, host: str, connection: HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle.setdefault((scheme, host), [])
+            if len(idle) < self.maxsize:
+                idle.append(connection)
+                return
+        connection.close()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
 
 
 class PokemonCardClient:
-    """Fetch card metadata by parsing the official Pokemon Card database."""
+    """Fetch card metadata by parsing the official Pokemon Card database.
 
-    def __init__(self, *, timeout: float = 10.0):
+    Resolved cards are memoized in memory for the lifetime of the client. When
+    ``cache_path`` is given they are additionally persisted to a ``shelve``
+    database so that later processes can skip the network entirely. With
+    ``revalidate=True`` persisted entries are instead confirmed with a
+    conditional GET, which costs a round trip but no page body while the card
+    is unchanged; they are still served if that request cannot complete.
+    Requests go through a pool of keep-alive connections. Call :meth:`close`
+    (or use the client as a context manager) to flush the store and drop the
+    pool.
+    """
+
+    def __init__(
+        self,
+        *,
+        timeout: float = 10.0,
+        max_workers: int = MAX_WORKERS,
+        cache_path: str | Path | None = None,
+        revalidate: bool = False,
+    ):
         self.timeout = timeout
+        self.revalidate = revalidate
+        self.max_workers = max_workers
+        self.cache_path = Path(cache_path) if cache_path is not None else None
         self._cache: Dict[int, RemoteCard] = {}
+        self._store: shelve.Shelf | None = None
+        self._store_failed = False
+        self._lock = threading.Lock()
+        self._pool = _ConnectionPool(timeout=timeout, maxsize=max_workers)
+
+    def __enter__(self) -> "PokemonCardClient":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Flush the on-disk cache and close any pooled connections."""
+
+        with self._lock:
+            if self._store is not None:
+                self._store.close()
+                self._store = None
+        self._pool.close()
 
     def build_detail_url(self, card_id: int) -> str:
         return DETAIL_URL_TEMPLATE.format(card_id=card_id)
 
     def fetch(self, card_id: int) -> RemoteCard:
-        if card_id in self._cache:
-            return self._cache[card_id]
+        with self._lock:
+            cached = self._cache.get(card_id)
+            entry = self._load_persisted(card_id) if cached is None else None
+            if entry is not None and not self.revalidate:
+                cached = self._cache[card_id] = entry.card
+        if cached is not None:
+            return cached
         detail_url = self.build_detail_url(card_id)
-        html = self._download(detail_url)
-        parser = _MetaTagParser()
-        parser.feed(html)
-        name = parser.meta.get("og:title") or parser.meta.get("title")
+        try:
+            page = self._download(detail_url, entry)
+        except URLError as exc:
+            # Revalidation is best effort: if the site cannot be reached (or
+            # fails with a server error) the persisted card is still good.
+            # A 4xx answer is authoritative and is reported as usual.
+            if entry is None or (isinstance(exc, HTTPError) and exc.code < 500):
+                raise
+            with self._lock:
+                self._cache[card_id] = entry.card
+            return entry.card
+        if page.body is not None:
+            card = self._parse_card(card_id, detail_url, page.body)
+            fresh = _CacheEntry(card, etag=page.etag, last_modified=page.last_modified)
+        else:
+            # 304 Not Modified, only possible when ``entry`` supplied validators.
+            # The page is unchanged, so validators the 304 omits carry over.
+            assert entry is not None
+            card = entry.card
+            fresh = _CacheEntry(
+                card,
+                etag=page.etag or entry.etag,
+                last_modified=page.last_modified or entry.last_modified,
+            )
+        with self._lock:
+            self._cache[card_id] = card
+            store = self._open_store()
+            if store is not None:
+                store[str(card_id)] = fresh
+        return card
+
+    @staticmethod
+    def _parse_card(card_id: int, detail_url: str, page: bytes) -> RemoteCard:
+        meta = _extract_meta(page)
+        name = meta.get("og:title") or meta.get("title")
         if not name:
             raise ValueError("Unable to extract card name from detail page")
-        image_url = parser.meta.get("og:image", detail_url)
-        card = RemoteCard(card_id=card_id, name=name.strip(), detail_url=detail_url, image_url=image_url.strip())
-        self._cache[card_id] = card
-        return card
+        image_url = meta.get("og:image", detail_url)
+        return RemoteCard(card_id=card_id, name=name.strip(), detail_url=detail_url, image_url=image_url.strip())
 
     def fetch_range(self, start: int, end: int) -> List[RemoteCard]:
+        """Fetch every card in ``start..end`` concurrently, skipping failures.
+
+        Results are returned in ascending ``card_id`` order regardless of the
+        order in which the requests complete.
+        """
+
         if end < start:
             raise ValueError("end must be greater than or equal to start")
-        results: List[RemoteCard] = []
-        for card_id in range(start, end + 1):
-            try:
-                results.append(self.fetch(card_id))
-            except (URLError, ValueError):
-                continue
+        results = self.fetch_many(range(start, end + 1))
+        return [card for _, card in sorted(results.items()) if card is not None]
+
+    def fetch_many(self, card_ids: Iterable[int]) -> Dict[int, RemoteCard | None]:
+        """Fetch several cards concurrently over the shared connection pool.
+
+        Every requested id is present in the result; ids that could not be
+        fetched or parsed map to ``None``.
+        """
+
+        pending = set(card_ids)
+        results: Dict[int, RemoteCard | None] = {}
+        if not pending:
+            return results
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pending))) as executor:
+            futures = {executor.submit(self.fetch, card_id): card_id for card_id in pending}
+            for future in as_completed(futures):
+                try:
+                    results[futures[future]] = future.result()
+                except (URLError, ValueError):
+                    results[futures[future]] = None
         return results
 
     def iter_range(self, start: int, end: int) -> Iterable[RemoteCard]:
         for card in self.fetch_range(start, end):
             yield card
 
-    def _download(self, url: str) -> str:
-        with urlopen(url, timeout=self.timeout) as response:
-            data = response.read()
-        return data.decode("utf-8", errors="ignore")
+    def _open_store(self) -> shelve.Shelf | None:
+        """Return the persistent store, opening it on first use. Caller holds the lock."""
+
+        if self._store is None and self.cache_path is not None and not self._store_failed:
+            try:
+                self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+                self._store = shelve.open(str(self.cache_path))
+            except dbm.error:
+                # ``dbm.error`` includes ``OSError``. An unusable store only
+                # costs the cross-process cache; keep going in memory.
+                self._store_failed = True
+        return self._store
+
+    def _load_persisted(self, card_id: int) -> _CacheEntry | None:
+        """Look ``card_id`` up in the persistent store. Caller holds the lock."""
+
+        store = self._open_store()
+        if store is None:
+            return None
+        try:
+            entry = store.get(str(card_id))
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError, TypeError, ValueError, *dbm.error):
+            # A truncated write or a pickle of a since-changed class; treat it
+            # as a miss so the card is downloaded and overwritten.
+            return None
+        if isinstance(entry, RemoteCard):
+            # Stores written before validators were recorded hold bare cards.
+            entry = _CacheEntry(entry)
+        if not isinstance(entry, _CacheEntry) or not isinstance(entry.card, RemoteCard):
+            return None
+        return entry
+
+    def _download(self, url: str, cached: _CacheEntry | None = None) -> _Page:
+        """Stream ``url`` until the end of ``<head>``.
 
+        When ``cached`` carries validators the request is made conditional and
+        a ``304 Not Modified`` answer yields a page without a body.
+        """
+
+        headers = {"User-Agent": USER_AGENT}
+        if cached is not None and cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached is not None and cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            target = parts.path or "/"
+            if parts.query:
+                target = f"{target}?{parts.query}"
+            connection, response = self._request(parts.scheme, parts.netloc, target, headers)
+            try:
+                etag = response.getheader("ETag")
+                last_modified = response.getheader("Last-Modified")
+                if response.status == 304 and cached is not None:
+                    return _Page(None, etag, last_modified)
+                if 300 <= response.status < 400 and response.getheader("Location"):
+                    url = urljoin(url, response.getheader("Location"))
+                    continue
+                if response.status != 200:
+                    raise HTTPError(url, response.status, response.reason, response.headers, None)
+                return _Page(self._read_head(response), etag, last_modified)
+            except URLError:
+                raise
+            except (OSError, HTTPException) as exc:
+                raise URLError(exc) from exc
+            finally:
+                self._finish(parts.scheme, parts.netloc, connection, response)
+        raise URLError(f"Too many redirects while fetching {url}")
+
+    def _request(
+        self, scheme: str, host: str, target: str, headers: Dict[str, str]
+    ) -> Tuple[HTTPConnection, HTTPResponse]:
+        """Send a GET on a pooled connection, retrying once if a reused one went stale."""
+
+        target, headers = self._pool.prepare(scheme, host, target, headers)
+        connection, reused = self._pool.acquire(scheme, host)
+        while True:
+            try:
+                connection.request("GET", target, headers=headers)
+                return connection, connection.getresponse()
+            except (OSError, HTTPException) as exc:
+                connection.close()
+                if not reused:
+                    raise URLError(exc) from exc
+                # The server may have dropped an idle keep-alive connection.
+                connection, reused = self._pool.acquire(scheme, host, fresh=True)
+
+    @staticmethod
+    def _read_head(response: HTTPResponse) -> bytes:
+        data = bytearray()
+        while True:
+            chunk = response.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            # Re-scan a few trailing bytes in case the tag spans two chunks.
+            scan_from = max(len(data) - 8, 0)
+            data += chunk
+            if _HEAD_END_RE.search(data, scan_from):
+                break
+        return bytes(data)
+
+    def _finish(self, scheme: str, host: str, connection: HTTPConnection, response: HTTPResponse) -> None:
+        """Return ``connection`` to the pool if the rest of ``response`` can be skipped cheaply.
+
+        Bodies with more than :data:`DRAIN_LIMIT` bytes left close the
+        connection; see the note on that constant. Chunked bodies, whose
+        length is unknown, are drained up to the same limit and the connection
+        is only kept if the body ended within it.
+        """
+
+        remaining = response.length
+        if response.will_close or (remaining is not None and remaining > DRAIN_LIMIT):
+            connection.close()
+            return
+        try:
+            if remaining is None:
+                response.read(DRAIN_LIMIT + 1)
+            else:
+                response.read()
+        except (OSError, HTTPException):
+            connection.close()
+            return
+        if not response.isclosed():
+            connection.close()
+            return
+        self._pool.release(scheme, host, connection)
 
-__all__ = ["RemoteCard", "PokemonCardClient"]
+__all__ = ["DEFAULT_CACHE_PATH", "RemoteCard", "PokemonCardClient"]
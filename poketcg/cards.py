@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
+from functools import cached_property
 from typing import List
 
 
@@ -47,6 +48,12 @@ class PokemonCard(Card):
     external_id: int | None = None
 
     def describe(self) -> str:
+        return self._description
+
+    @cached_property
+    def _description(self) -> str:
+        # ``cached_property`` stores into the instance ``__dict__`` directly,
+        # which frozen dataclasses permit; the card never changes afterwards.
         attacks = ", ".join(f"{a.name} ({a.damage})" for a in self.attacks)
         return f"{self.name} [HP {self.hp}] :: {attacks}"
 
@@ -1,29 +1,57 @@
 """Deck construction helpers."""
 from __future__ import annotations
 
+import random
+from collections import deque
 from dataclasses import dataclass
-from typing import Iterable, List
+from typing import Deque, Iterable, List
 
 from .cards import Card
 
 
 @dataclass
 class Deck:
-    """A shuffled stack of cards used by a single player."""
+    """A shuffled stack of cards used by a single player.
 
-    cards: List[Card]
+    Cards are kept in a :class:`collections.deque` so drawing from the top is
+    proportional to the number of cards drawn rather than the deck size.
+    """
+
+    cards: Deque[Card]
+
+    def __post_init__(self) -> None:
+        if not isinstance(self.cards, deque):
+            self.cards = deque(self.cards)
 
     def draw(self, n: int = 1) -> List[Card]:
         """Draw ``n`` cards from the top of the deck."""
 
+        drawn: List[Card] = []
+        self.draw_into(drawn, n)
+        return drawn
+
+    def draw_into(self, target: List[Card], n: int = 1) -> None:
+        """Move ``n`` cards from the top of the deck onto the end of ``target``."""
+
         if n < 0:
             raise ValueError("n must be non-negative")
-        if n == 0:
-            return []
         if len(self.cards) < n:
             raise RuntimeError("Cannot draw more cards than remaining in deck")
-        drawn, self.cards = self.cards[:n], self.cards[n:]
-        return drawn
+        append = target.append
+        popleft = self.cards.popleft
+        for _ in range(n):
+            append(popleft())
+
+    def shuffle(self, rng: random.Random) -> None:
+        """Shuffle the deck in place using ``rng``.
+
+        ``random.shuffle`` relies on indexed access, which is linear for a
+        deque, so the cards are shuffled as a list and wrapped again.
+        """
+
+        cards = list(self.cards)
+        rng.shuffle(cards)
+        self.cards = deque(cards)
 
     def __len__(self) -> int:  # pragma: no cover - trivial
         return len(self.cards)
@@ -35,10 +63,10 @@ class Deck:
         current deck state without mutating the original list.
         """
 
-        return Deck(list(self.cards))
+        return Deck(self.cards.copy())
 
     @classmethod
     def from_iterable(cls, cards: Iterable[Card]) -> "Deck":
         """Create a deck from ``cards`` preserving order."""
 
-        return cls(list(cards))
+        return cls(deque(cards))
@@ -1,22 +1,57 @@
 """Simplified Pokemon TCG gameplay loop."""
 from __future__ import annotations
 
+import hashlib
+import json
 import random
-from dataclasses import dataclass
+from array import array
+from collections.abc import Sequence
+from dataclasses import asdict, dataclass
 from enum import Enum, auto
-from typing import List, Optional, Tuple
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple, overload
 
 from .cards import PokemonCard
 from .deck import Deck
 from .player import Player
 
 
+# Bumped whenever the recording layout changes. Changes to the rules of play
+# are picked up automatically through ``_rules_digest``.
+REPLAY_FORMAT = 1
+# Modules whose code decides how a game plays out.
+_RULES_MODULES = ("cards.py", "deck.py", "player.py", "game.py")
+
+
+@lru_cache(maxsize=None)
+def _rules_digest() -> str:
+    """Hash the engine source so recordings made by other rules never match."""
+
+    digest = hashlib.sha256()
+    for name in _RULES_MODULES:
+        try:
+            digest.update(Path(__file__).with_name(name).read_bytes())
+        except OSError:
+            # Source is unavailable (e.g. a zipped install); only
+            # ``REPLAY_FORMAT`` guards recordings then.
+            digest.update(name.encode("utf-8"))
+    return digest.hexdigest()
+
+
 class Turn(Enum):
     PLAYER_ONE = auto()
     PLAYER_TWO = auto()
 
     def opposite(self) -> "Turn":
-        return Turn.PLAYER_TWO if self is Turn.PLAYER_ONE else Turn.PLAYER_ONE
+        return _OPPOSITES[self]
+
+
+# Seat <-> position in ``PokemonGame.players``. The game loop works on the
+# integer position; ``Turn`` members are only produced at the API boundary.
+_TURNS = (Turn.PLAYER_ONE, Turn.PLAYER_TWO)
+_TURN_INDEX = {Turn.PLAYER_ONE: 0, Turn.PLAYER_TWO: 1}
+_OPPOSITES = {Turn.PLAYER_ONE: Turn.PLAYER_TWO, Turn.PLAYER_TWO: Turn.PLAYER_ONE}
 
 
 @dataclass
@@ -43,11 +78,115 @@ class GameSnapshot:
     players: dict[Turn, PlayerSnapshot]
 
 
+class SnapshotTimeline(Sequence[GameSnapshot]):
+    """Column-oriented store of the snapshots recorded during a game.
+
+    Recording a snapshot only appends scalar fields to a handful of parallel
+    arrays; :class:`GameSnapshot` and :class:`PlayerSnapshot` objects are built
+    lazily the first time an index is read and then reused, so replays that
+    never inspect the timeline pay no allocation cost for it. Per-player
+    columns are interleaved, with player one at even and player two at odd
+    offsets.
+    """
+
+    def __init__(self) -> None:
+        self._turns: List[Turn] = []
+        self._turn_counts = array("i")
+        self._descriptions: List[str] = []
+        self._names: List[str] = []
+        self._deck_sizes = array("i")
+        self._hand_sizes = array("i")
+        self._discard_sizes = array("i")
+        self._prizes = array("i")
+        self._active_names: List[Optional[str]] = []
+        self._active_hps = array("i")
+        self._active_external_ids: List[Optional[int]] = []
+        self._materialized: List[Optional[GameSnapshot]] = []
+
+    def record(self, active_turn: Turn, turn_count: int, description: str, players: Tuple[Player, Player]) -> None:
+        """Append the current public state of ``players``."""
+
+        self._turns.append(active_turn)
+        self._turn_counts.append(turn_count)
+        self._descriptions.append(description)
+        for player in players:
+            active = player.active_pokemon
+            self._names.append(player.name)
+            self._deck_sizes.append(len(player.deck.cards))
+            self._hand_sizes.append(len(player.hand))
+            self._discard_sizes.append(len(player.discard_pile))
+            self._prizes.append(len(player.prizes))
+            self._active_names.append(active.name if active is not None else None)
+            self._active_hps.append(player.active_hp)
+            self._active_external_ids.append(getattr(active, "external_id", None) if active else None)
+        self._materialized.append(None)
+
+    def clear(self) -> None:
+        columns = (
+            self._turns,
+            self._turn_counts,
+            self._descriptions,
+            self._names,
+            self._deck_sizes,
+            self._hand_sizes,
+            self._discard_sizes,
+            self._prizes,
+            self._active_names,
+            self._active_hps,
+            self._active_external_ids,
+            self._materialized,
+        )
+        for column in columns:
+            del column[:]
+
+    def __len__(self) -> int:
+        return len(self._turns)
+
+    @overload
+    def __getitem__(self, index: int) -> GameSnapshot: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[GameSnapshot]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("snapshot index out of range")
+        snapshot = self._materialized[index]
+        if snapshot is None:
+            snapshot = GameSnapshot(
+                active_turn=self._turns[index],
+                turn_count=self._turn_counts[index],
+                description=self._descriptions[index],
+                players={
+                    Turn.PLAYER_ONE: self._player(2 * index),
+                    Turn.PLAYER_TWO: self._player(2 * index + 1),
+                },
+            )
+            self._materialized[index] = snapshot
+        return snapshot
+
+    def _player(self, offset: int) -> PlayerSnapshot:
+        return PlayerSnapshot(
+            name=self._names[offset],
+            deck_size=self._deck_sizes[offset],
+            hand_size=self._hand_sizes[offset],
+            discard_size=self._discard_sizes[offset],
+            prizes_remaining=self._prizes[offset],
+            active_name=self._active_names[offset],
+            active_hp=self._active_hps[offset],
+            active_external_id=self._active_external_ids[offset],
+        )
+
+
 @dataclass
 class GameResult:
     winner: Optional[Turn]
-    log: List[str]
-    snapshots: List[GameSnapshot]
+    log: Tuple[str, ...]
+    snapshots: Sequence[GameSnapshot]
 
 
 class PokemonGame:
@@ -60,51 +199,64 @@ class PokemonGame:
     follow and suitable for experimentation.
     """
 
-    def __init__(self, player_one: Player, player_two: Player, *, seed: int | None = None):
+    def __init__(
+        self,
+        player_one: Player,
+        player_two: Player,
+        *,
+        seed: int | None = None,
+        log_enabled: bool = True,
+    ):
+        self.seed = seed
         self.random = random.Random(seed)
-        self.players = {
-            Turn.PLAYER_ONE: player_one,
-            Turn.PLAYER_TWO: player_two,
-        }
-        self.turn = Turn.PLAYER_ONE
+        # Indexed by position rather than keyed by ``Turn``; see :meth:`player`.
+        self.players: Tuple[Player, Player] = (player_one, player_two)
+        self.turn_idx = 0
         self.turn_count = 0
+        # Headless callers (e.g. RL rollouts that only read the winner) can
+        # disable logging to skip formatting every message.
+        self.log_enabled = log_enabled
         self.log: List[str] = []
-        self.snapshots: List[GameSnapshot] = []
+        self.snapshots = SnapshotTimeline()
+        # True while ``self.log`` is shared with a clone; see ``_writable_log``.
+        self._log_shared = False
 
-    def _snapshot_player(self, player: Player) -> PlayerSnapshot:
-        active = player.active_pokemon
-        return PlayerSnapshot(
-            name=player.name,
-            deck_size=len(player.deck.cards),
-            hand_size=len(player.hand),
-            discard_size=len(player.discard_pile),
-            prizes_remaining=len(player.prizes),
-            active_name=active.name if active is not None else None,
-            active_hp=player.active_hp,
-            active_external_id=getattr(active, "external_id", None) if active else None,
-        )
+    def _writable_log(self) -> List[str]:
+        """Return ``self.log``, detaching it first if it is shared with a clone."""
+
+        if self._log_shared:
+            self.log = list(self.log)
+            self._log_shared = False
+        return self.log
+
+    def player(self, turn: Turn) -> Player:
+        """Return the player seated at ``turn``."""
+
+        return self.players[_TURN_INDEX[turn]]
+
+    @property
+    def turn(self) -> Turn:
+        """The player whose turn it is. Backed by the integer ``turn_idx``."""
+
+        return _TURNS[self.turn_idx]
+
+    @turn.setter
+    def turn(self, turn: Turn) -> None:
+        self.turn_idx = _TURN_INDEX[turn]
 
     def _record_snapshot(self, description: str, *, active_turn: Optional[Turn] = None) -> None:
         turn = active_turn if active_turn is not None else self.turn
-        snapshot = GameSnapshot(
-            active_turn=turn,
-            turn_count=self.turn_count,
-            description=description,
-            players={
-                Turn.PLAYER_ONE: self._snapshot_player(self.players[Turn.PLAYER_ONE]),
-                Turn.PLAYER_TWO: self._snapshot_player(self.players[Turn.PLAYER_TWO]),
-            },
+        self.snapshots.record(
+            turn,
+            self.turn_count,
+            description,
+            self.players,
         )
-        self.snapshots.append(snapshot)
 
     def _setup_player(self, player: Player) -> None:
-        self.random.shuffle(player.deck.cards)
-        player.hand.clear()
-        player.discard_pile.clear()
-        player.prizes.clear()
-        player.active_pokemon = None
-        player.active_hp = 0
-        player.draw(7)
+        player.deck.shuffle(self.random)
+        player.reset()
+        player.draw_into_hand(7)
         player.setup_prizes()
         if not player.promote_from_hand():
             raise RuntimeError(f"Player {player.name} has no Pokemon to start the game")
@@ -112,78 +264,101 @@ class PokemonGame:
     def setup(self) -> None:
         """Shuffle decks, draw opening hands and promote the initial Pokemon."""
 
-        for player in self.players.values():
+        for player in self.players:
             self._setup_player(player)
-        self.turn = Turn.PLAYER_ONE
+        self.turn_idx = 0
         self.turn_count = 0
-        self.log.append("Game setup complete.")
-        for turn in Turn:
-            player = self.players[turn]
-            assert player.active_pokemon is not None
-            self.log.append(
-                f"{player.name} opens with {player.active_pokemon.name} (HP {player.active_hp})."
-            )
+        if self.log_enabled:
+            log = self._writable_log()
+            log.append("Game setup complete.")
+            for player in self.players:
+                assert player.active_pokemon is not None
+                log.append(
+                    f"{player.name} opens with {player.active_pokemon.name} (HP {player.active_hp})."
+                )
         self.snapshots.clear()
         self._record_snapshot("Setup complete")
 
-    def _draw_phase(self, player: Player, *, active_turn: Turn) -> bool:
+    def _draw_phase(self, player: Player, log_append: Optional[Callable[[str], None]], *, active_turn: Turn) -> bool:
         """Handle the start-of-turn draw. Returns False if the player decks out."""
 
         if len(player.deck.cards) == 0:
-            self.log.append(f"{player.name} cannot draw and loses by deck out.")
+            if log_append is not None:
+                log_append(f"{player.name} cannot draw and loses by deck out.")
             self._record_snapshot("Deck out", active_turn=active_turn)
             return False
         card = player.draw()[0]
-        self.log.append(f"{player.name} draws {card.name}.")
+        if log_append is not None:
+            log_append(f"{player.name} draws {card.name}.")
         return True
 
-    def _attack(self, attacker: Player, defender: Player) -> None:
+    def _attack(
+        self,
+        attacker: Player,
+        defender: Player,
+        log_append: Optional[Callable[[str], None]],
+        *,
+        active_turn: Turn,
+    ) -> Optional[Turn]:
+        """Resolve the active player's attack and return the winner if it ends the game.
+
+        Knock-outs are the only way a turn can end the game, so victory is
+        decided here rather than by re-inspecting both boards every turn.
+        """
+
         pokemon = attacker.active_pokemon
         if pokemon is None:
-            self.log.append(f"{attacker.name} has no active Pokemon and loses the turn.")
-            return
+            if log_append is not None:
+                log_append(f"{attacker.name} has no active Pokemon and loses the turn.")
+            return None
         if not pokemon.attacks:
-            self.log.append(f"{pokemon.name} cannot attack.")
-            return
+            if log_append is not None:
+                log_append(f"{pokemon.name} cannot attack.")
+            return None
         attack = pokemon.attacks[0]
-        self.log.append(f"{attacker.name}'s {pokemon.name} uses {attack.name} for {attack.damage} damage.")
+        if log_append is not None:
+            log_append(f"{attacker.name}'s {pokemon.name} uses {attack.name} for {attack.damage} damage.")
         knocked_out = defender.damage_active(attack.damage)
         if knocked_out:
-            self.log.append(f"{defender.name}'s {defender.active_pokemon.name} is knocked out!")
+            if log_append is not None:
+                log_append(f"{defender.name}'s {defender.active_pokemon.name} is knocked out!")
             defender.discard_active()
             prize = attacker.take_prize()
-            if prize is not None:
-                self.log.append(f"{attacker.name} takes a prize card: {prize.name}.")
+            if prize is not None and log_append is not None:
+                log_append(f"{attacker.name} takes a prize card: {prize.name}.")
+            winner: Optional[Turn] = None
             if not attacker.prizes:
-                self.log.append(f"{attacker.name} takes the final prize and wins!")
+                if log_append is not None:
+                    log_append(f"{attacker.name} takes the final prize and wins!")
+                winner = active_turn
             if not defender.promote_from_hand():
-                self.log.append(f"{defender.name} has no replacement Pokemon and loses!")
-
-    def _check_victory(self) -> Optional[Turn]:
-        for turn, player in self.players.items():
-            if not player.prizes:
-                return turn
-            if player.active_pokemon is None and not player.has_pokemon_in_hand():
-                return turn.opposite()
+                if log_append is not None:
+                    log_append(f"{defender.name} has no replacement Pokemon and loses!")
+                winner = active_turn
+            return winner
         return None
 
     def step(self) -> Optional[Turn]:
         """Play a single turn and return the winner if the game ends."""
 
-        active_turn = self.turn
-        player = self.players[active_turn]
-        opponent = self.players[active_turn.opposite()]
+        idx = self.turn_idx
+        active_turn = _TURNS[idx]
+        player = self.players[idx]
+        opponent = self.players[1 - idx]
         self.turn_count += 1
-        self.log.append(f"--- Turn {self.turn_count}: {player.name} ---")
-
-        if not self._draw_phase(player, active_turn=active_turn):
+        # Bind once per turn; the helpers below receive it instead of
+        # resolving ``self.log.append`` for every line they emit. ``None``
+        # means logging is disabled and no message should be formatted.
+        log_append = self._writable_log().append if self.log_enabled else None
+        if log_append is not None:
+            log_append(f"--- Turn {self.turn_count}: {player.name} ---")
+
+        if not self._draw_phase(player, log_append, active_turn=active_turn):
             return active_turn.opposite()
 
-        self._attack(player, opponent)
-
-        winner = self._check_victory()
+        winner = self._attack(player, opponent, log_append, active_turn=active_turn)
         self._record_snapshot(f"After turn {self.turn_count}", active_turn=active_turn)
-        self.turn = active_turn.opposite()
+        self.turn_idx = 1 - idx
         return winner
 
     def play(self, *, max_turns: int = 100) -> GameResult:
@@ -193,18 +368,117 @@ class PokemonGame:
         winner: Optional[Turn] = None
         while winner is None and self.turn_count < max_turns:
             winner = self.step()
-        if winner is None:
-            self.log.append("Game ended due to turn limit.")
-        else:
-            self.log.append(f"Winner: {self.players[winner].name}")
-        self._record_snapshot("Game end", active_turn=self.turn.opposite())
-        return GameResult(winner=winner, log=list(self.log), snapshots=list(self.snapshots))
+        log = self._writable_log()
+        if self.log_enabled:
+            if winner is None:
+                log.append("Game ended due to turn limit.")
+            else:
+                log.append(f"Winner: {self.player(winner).name}")
+        self._record_snapshot("Game end", active_turn=_TURNS[1 - self.turn_idx])
+        # The snapshot timeline is already read-only, so it is handed over
+        # as-is; the game starts a fresh history if it is played again.
+        result = GameResult(winner=winner, log=tuple(log), snapshots=self.snapshots)
+        self.log = []
+        self.snapshots = SnapshotTimeline()
+        return result
+
+    def fingerprint(self, *, max_turns: int) -> str:
+        """Return a stable digest of everything that determines the outcome of :meth:`play`.
+
+        The digest covers the engine source, seed, turn limit, logging mode,
+        player names and deck contents in their current order, so it must be
+        taken before the game is played. Unseeded games are not reproducible
+        and are rejected.
+        """
+
+        if self.seed is None:
+            raise ValueError("Only seeded games can be fingerprinted")
+        digest = hashlib.sha256()
+        digest.update(repr((REPLAY_FORMAT, _rules_digest(), self.seed, max_turns, self.log_enabled)).encode("utf-8"))
+        for player in self.players:
+            digest.update(repr((player.name, len(player.deck.cards))).encode("utf-8"))
+            for card in player.deck.cards:
+                digest.update(repr(card).encode("utf-8"))
+        return digest.hexdigest()
+
+    def record(self, path: str | Path, *, max_turns: int = 100) -> GameResult:
+        """Play the game and save its result to ``path`` for :meth:`replay`."""
+
+        fingerprint = self.fingerprint(max_turns=max_turns)
+        result = self.play(max_turns=max_turns)
+        self.save_replay(path, result, fingerprint=fingerprint)
+        return result
+
+    @staticmethod
+    def save_replay(path: str | Path, result: GameResult, *, fingerprint: str) -> None:
+        """Write ``result`` to ``path`` for :meth:`replay`.
+
+        ``fingerprint`` must have been taken from the game before it was played.
+        """
+
+        payload = {
+            "format": REPLAY_FORMAT,
+            "fingerprint": fingerprint,
+            "winner": None if result.winner is None else _TURN_INDEX[result.winner],
+            "log": list(result.log),
+            "snapshots": [
+                {
+                    "active_turn": _TURN_INDEX[snapshot.active_turn],
+                    "turn_count": snapshot.turn_count,
+                    "description": snapshot.description,
+                    "players": [asdict(snapshot.players[turn]) for turn in _TURNS],
+                }
+                for snapshot in result.snapshots
+            ],
+        }
+        output = Path(path)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+
+    @staticmethod
+    def replay(path: str | Path, *, fingerprint: str | None = None) -> GameResult:
+        """Load a result saved by :meth:`record` without running any game logic.
+
+        When ``fingerprint`` is given the recording must have been made from a
+        game with that :meth:`fingerprint`, otherwise ``ValueError`` is raised.
+        A file that is not a well-formed recording also raises ``ValueError``.
+        """
+
+        payload = json.loads(Path(path).read_text(encoding="utf-8"))
+        if not isinstance(payload, dict) or payload.get("format") != REPLAY_FORMAT:
+            raise ValueError("Unsupported replay format")
+        if fingerprint is not None and payload.get("fingerprint") != fingerprint:
+            raise ValueError("Replay was recorded from a different game")
+
+        def turn_at(index: object) -> Turn:
+            if type(index) is not int or not 0 <= index < len(_TURNS):
+                raise ValueError(f"Invalid turn index in replay: {index!r}")
+            return _TURNS[index]
+
+        try:
+            winner = payload["winner"]
+            snapshots = [
+                GameSnapshot(
+                    active_turn=turn_at(entry["active_turn"]),
+                    turn_count=entry["turn_count"],
+                    description=entry["description"],
+                    players={turn: PlayerSnapshot(**player) for turn, player in zip(_TURNS, entry["players"])},
+                )
+                for entry in payload["snapshots"]
+            ]
+            return GameResult(
+                winner=None if winner is None else turn_at(winner),
+                log=tuple(payload["log"]),
+                snapshots=snapshots,
+            )
+        except (AttributeError, KeyError, TypeError) as exc:
+            raise ValueError("Malformed replay") from exc
 
     def clone(self) -> "PokemonGame":
         """Return a deep-ish copy of the game state for experimentation."""
 
-        cloned_players = {
-            turn: Player(
+        cloned_players = [
+            Player(
                 name=player.name,
                 deck=Deck(player.deck.cards.copy()),
                 hand=list(player.hand),
@@ -213,12 +487,14 @@ class PokemonGame:
                 active_pokemon=player.active_pokemon,
                 active_hp=player.active_hp,
             )
-            for turn, player in self.players.items()
-        }
-        clone = PokemonGame(cloned_players[Turn.PLAYER_ONE], cloned_players[Turn.PLAYER_TWO])
-        clone.turn = self.turn
+            for player in self.players
+        ]
+        clone = PokemonGame(*cloned_players, log_enabled=self.log_enabled)
+        clone.turn_idx = self.turn_idx
         clone.turn_count = self.turn_count
-        clone.log = list(self.log)
+        # Share the history until either game appends to it.
+        clone.log = self.log
+        clone._log_shared = self._log_shared = True
         return clone
 
     def current_state(self) -> Tuple[Player, Player, Turn]:
@@ -229,7 +505,7 @@ class PokemonGame:
         """
 
         return (
-            self.players[Turn.PLAYER_ONE],
-            self.players[Turn.PLAYER_TWO],
+            self.players[0],
+            self.players[1],
             self.turn,
         )
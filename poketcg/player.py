@@ -1,8 +1,10 @@
 """Player and board state models."""
 from __future__ import annotations
 
+from collections import deque
 from dataclasses import dataclass, field
-from typing import List, Optional
+from itertools import islice
+from typing import Deque, Iterable, List, Optional
 
 from .cards import Card, PokemonCard
 from .deck import Deck
@@ -10,7 +12,13 @@ from .deck import Deck
 
 @dataclass
 class Player:
-    """Represents the mutable state of a player during a game."""
+    """Represents the mutable state of a player during a game.
+
+    The Pokemon cards in ``hand`` are additionally tracked, in hand order, so
+    that promotion and the "any Pokemon left?" check do not have to scan the
+    hand. Cards should therefore enter and leave the hand through the methods
+    below rather than by mutating ``hand`` directly.
+    """
 
     name: str
     deck: Deck
@@ -19,14 +27,48 @@ class Player:
     prizes: List[Card] = field(default_factory=list)
     active_pokemon: Optional[PokemonCard] = None
     active_hp: int = 0
+    _pokemon_in_hand: Deque[PokemonCard] = field(default_factory=deque, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self._index_hand(self.hand)
+
+    def _index_hand(self, cards: Iterable[Card]) -> None:
+        pokemon = self._pokemon_in_hand
+        for card in cards:
+            if isinstance(card, PokemonCard):
+                pokemon.append(card)
+
+    def reset(self) -> None:
+        """Return every zone to its empty pre-game state (the deck is untouched)."""
+
+        self.hand.clear()
+        self._pokemon_in_hand.clear()
+        self.discard_pile.clear()
+        self.prizes.clear()
+        self.active_pokemon = None
+        self.active_hp = 0
 
     def draw(self, n: int = 1) -> List[Card]:
         """Draw ``n`` cards into the hand."""
 
+        if n == 1 and self.deck.cards:
+            card = self.deck.cards.popleft()
+            self.hand.append(card)
+            if isinstance(card, PokemonCard):
+                self._pokemon_in_hand.append(card)
+            return [card]
         cards = self.deck.draw(n)
         self.hand.extend(cards)
+        self._index_hand(cards)
         return cards
 
+    def draw_into_hand(self, n: int) -> None:
+        """Draw ``n`` cards into the hand without returning them."""
+
+        start = len(self.hand)
+        self.deck.draw_into(self.hand, n)
+        self._index_hand(islice(self.hand, start, None))
+
     def setup_prizes(self, count: int = 6) -> None:
         """Put ``count`` cards aside as prize cards."""
 
@@ -39,21 +81,25 @@ class Player:
             return None
         card = self.prizes.pop(0)
         self.hand.append(card)
+        if isinstance(card, PokemonCard):
+            self._pokemon_in_hand.append(card)
         return card
 
     def has_pokemon_in_hand(self) -> bool:
-        return any(isinstance(card, PokemonCard) for card in self.hand)
+        return bool(self._pokemon_in_hand)
 
     def promote_from_hand(self) -> bool:
         """Promote the first Pokemon card in hand to the active spot."""
 
-        for idx, card in enumerate(self.hand):
-            if isinstance(card, PokemonCard):
-                self.active_pokemon = card
-                self.active_hp = card.hp
-                del self.hand[idx]
-                return True
-        return False
+        if not self._pokemon_in_hand:
+            return False
+        card = self._pokemon_in_hand.popleft()
+        self.active_pokemon = card
+        self.active_hp = card.hp
+        # Every card ahead of ``card`` in the hand is a non-Pokemon, so the
+        # first match is ``card`` itself.
+        self.hand.remove(card)
+        return True
 
     def damage_active(self, amount: int) -> bool:
         """Apply damage to the active Pokemon.
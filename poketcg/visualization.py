@@ -1,119 +1,298 @@
 """Visualization helpers for rendering game progress to HTML."""
 from __future__ import annotations
 
-from dataclasses import dataclass
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import asdict
+from functools import lru_cache
 from html import escape
+from io import StringIO
 from pathlib import Path
-from typing import Dict, Iterable, Sequence
+from typing import Dict, Iterable, NamedTuple, Sequence, Set, TextIO, Tuple
 
 from .card_data import PokemonCardClient, RemoteCard
 from .game import GameSnapshot, PlayerSnapshot, Turn
 
+# Player names, Pokemon names and turn labels repeat on every snapshot; only
+# one-off text such as snapshot descriptions goes through ``escape`` directly.
+_esc = lru_cache(maxsize=4096)(escape)
+# Rendered snapshot sections kept by a ``GameVisualizer`` for later renders.
+SNAPSHOT_CACHE_SIZE = 1024
+
+_PROLOGUE = """<!DOCTYPE html>
+<html lang=\"ja\">
+<head>
+<meta charset=\"utf-8\" />
+<title>Pokemon TCG Replay</title>
+<style>
+body { font-family: 'Segoe UI', sans-serif; background: #f5f5f5; margin: 0; padding: 2rem; }
+section { background: #ffffff; border-radius: 8px; padding: 1.5rem; margin-bottom: 1.5rem; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }
+section h2 { margin-top: 0; }
+.player { display: flex; gap: 1rem; align-items: center; margin-top: 1rem; }
+.player img { width: 120px; border-radius: 4px; box-shadow: 0 1px 3px rgba(0,0,0,0.2); }
+.player .info { background: #f0f4ff; padding: 0.75rem 1rem; border-radius: 6px; flex: 1; }
+small { color: #3366cc; display: block; margin-top: 0.5rem; word-break: break-all; }
+</style>
+</head>
+<body>
+<h1>Pokemon TCG Replay</h1>
+"""
+_EPILOGUE = """
+</body>
+</html>"""
+# Per-snapshot markup, parsed once here rather than on every f-string evaluation.
+_SNAPSHOT_HEADER_TEMPLATE = "<section><h2>ステップ {index}: Turn {turn_count} ({turn_label})</h2><p>{description}</p>"
+_PLAYER_TEMPLATE = (
+    "<div class=\"player\">{image}<div class=\"info\">"
+    "<strong>{name}</strong><br />{active_name} {active_hp}<br />"
+    # The labels are plain text and the counts are ints, so none of this needs escaping.
+    "<span>手札 {hand_size} / 山札 {deck_size} / トラッシュ {discard_size} / サイド {prizes_remaining}</span>"
+    "{reference}</div></div>"
+)
+_IMAGE_TEMPLATE = "<img src=\"{image_url}\" alt=\"{name}\" />"
+_PLACEHOLDER_IMAGE = "<div class=\"placeholder\">画像なし</div>"
+_REFERENCE_TEMPLATE = (
+    "<small>参照: <a href=\"{detail_url}\" target=\"_blank\" rel=\"noopener\">{detail_url}</a></small>"
+)
+
+
+class EscapedCard(NamedTuple):
+    """HTML-escaped display fields of a :class:`RemoteCard`."""
+
+    name: str
+    image_url: str
+    detail_url: str
+
 
-@dataclass
 class CardMetadataResolver:
-    """Resolve and cache remote card metadata for visualization."""
+    """Resolve and cache remote card metadata for visualization.
 
-    client: PokemonCardClient
+    When ``cache_path`` is given, previously resolved cards are loaded from
+    that JSON file and newly resolved ones are written back by :meth:`flush`,
+    so later processes rendering similar replays skip the network.
+    """
 
-    def __post_init__(self) -> None:
+    __slots__ = ("client", "cache_path", "version", "_cache", "_failed", "_escaped", "_lock", "_dirty")
+
+    def __init__(self, client: PokemonCardClient, cache_path: str | Path | None = None):
+        self.client = client
+        self.cache_path = Path(cache_path) if cache_path is not None else None
         self._cache: Dict[int, RemoteCard] = {}
+        # Ids whose lookup failed. Failures are never cached for good: they are
+        # skipped by :meth:`resolve` until the next :meth:`bulk_resolve`, which
+        # retries them, so one render does not wait on the same failure twice.
+        self._failed: Set[int] = set()
+        self._escaped: Dict[int, EscapedCard] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        # Bumped whenever a new id is cached, letting callers invalidate output
+        # rendered from earlier lookups.
+        self.version = 0
+        if self.cache_path is not None:
+            self._load()
+
+    def _load(self) -> None:
+        assert self.cache_path is not None
+        try:
+            entries = json.loads(self.cache_path.read_text(encoding="utf-8"))
+            self._cache = {int(card_id): RemoteCard(**entry) for card_id, entry in entries.items()}
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, TypeError, AttributeError):
+            # A corrupt cache is simply rebuilt on the next flush.
+            self._dirty = True
+
+    def flush(self) -> None:
+        """Atomically write the resolved cards to ``cache_path`` if anything changed."""
+
+        if self.cache_path is None or not self._dirty:
+            return
+        with self._lock:
+            entries = {str(card_id): asdict(card) for card_id, card in self._cache.items()}
+            self._dirty = False
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.cache_path.with_name(f"{self.cache_path.name}.tmp")
+        temp_path.write_text(json.dumps(entries, ensure_ascii=False), encoding="utf-8")
+        os.replace(temp_path, self.cache_path)
 
     def resolve(self, card_id: int) -> RemoteCard | None:
-        if card_id in self._cache:
-            return self._cache[card_id]
+        card = self._cache.get(card_id)
+        if card is not None or card_id in self._failed:
+            return card
         try:
             card = self.client.fetch(card_id)
         except Exception:
+            with self._lock:
+                self._failed.add(card_id)
+            return None
+        with self._lock:
+            self._dirty = True
+            self.version += 1
+            return self._cache.setdefault(card_id, card)
+
+    def bulk_resolve(self, card_ids: Iterable[int]) -> None:
+        """Resolve every id not cached yet with a single :meth:`PokemonCardClient.fetch_many` batch.
+
+        Ids that failed earlier are retried. Clients without ``fetch_many``
+        fall back to one :meth:`resolve` per id.
+        """
+
+        missing = {card_id for card_id in card_ids if card_id not in self._cache}
+        if not missing:
+            return
+        with self._lock:
+            self._failed -= missing
+        fetch_many = getattr(self.client, "fetch_many", None)
+        if fetch_many is None:
+            for card_id in missing:
+                self.resolve(card_id)
+            return
+        try:
+            fetched = fetch_many(missing)
+        except (OSError, ValueError):
+            fetched = {}
+        with self._lock:
+            for card_id in missing:
+                card = fetched.get(card_id)
+                if card is None:
+                    self._failed.add(card_id)
+                elif card_id not in self._cache:
+                    self._cache[card_id] = card
+                    self._dirty = True
+                    self.version += 1
+
+    def resolve_escaped(self, card_id: int) -> EscapedCard | None:
+        """Like :meth:`resolve`, but return the fields escaped for HTML, escaping each card once."""
+
+        escaped = self._escaped.get(card_id)
+        if escaped is not None:
+            return escaped
+        card = self.resolve(card_id)
+        if card is None:
             return None
-        self._cache[card_id] = card
-        return card
+        escaped = EscapedCard(escape(card.name), escape(card.image_url), escape(card.detail_url))
+        self._escaped[card_id] = escaped
+        return escaped
 
 
 class GameVisualizer:
-    """Render a match timeline as an HTML document."""
+    """Render a match timeline as an HTML document.
+
+    The HTML of recently rendered snapshots is kept in an LRU cache of
+    ``snapshot_cache_size`` entries so that rendering the same timeline again
+    (e.g. from a long-lived web view) skips the formatting work. One-off
+    renders can pass ``0`` to keep nothing alive after :meth:`render_html`.
+    """
 
-    def __init__(self, resolver: CardMetadataResolver | None = None):
+    def __init__(
+        self,
+        resolver: CardMetadataResolver | None = None,
+        *,
+        snapshot_cache_size: int = SNAPSHOT_CACHE_SIZE,
+    ):
         self.resolver = resolver or CardMetadataResolver(PokemonCardClient())
+        self.snapshot_cache_size = snapshot_cache_size
+        # (id(snapshot), index) -> (snapshot, resolver version, html). The
+        # snapshot itself is kept so its id cannot be reused by another object.
+        self._snapshot_cache: OrderedDict[Tuple[int, int], Tuple[GameSnapshot, int, str]] = OrderedDict()
 
     def render_html(self, snapshots: Sequence[GameSnapshot], output_path: str | Path) -> Path:
         if not snapshots:
             raise ValueError("No snapshots to render")
         output = Path(output_path)
-        html = self._build_document(snapshots)
-        output.write_text(html, encoding="utf-8")
+        self._prefetch(snapshots)
+        self.resolver.flush()
+        with output.open("w", encoding="utf-8") as fp:
+            self._write_document(fp, snapshots)
         return output
 
-    def _build_document(self, snapshots: Sequence[GameSnapshot]) -> str:
-        sections = [self._render_snapshot(index, snapshot) for index, snapshot in enumerate(snapshots, start=1)]
-        joined = "\n".join(sections)
-        return f"""<!DOCTYPE html>
-<html lang=\"ja\">
-<head>
-<meta charset=\"utf-8\" />
-<title>Pokemon TCG Replay</title>
-<style>
-body {{ font-family: 'Segoe UI', sans-serif; background: #f5f5f5; margin: 0; padding: 2rem; }}
-section {{ background: #ffffff; border-radius: 8px; padding: 1.5rem; margin-bottom: 1.5rem; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }}
-section h2 {{ margin-top: 0; }}
-.player {{ display: flex; gap: 1rem; align-items: center; margin-top: 1rem; }}
-.player img {{ width: 120px; border-radius: 4px; box-shadow: 0 1px 3px rgba(0,0,0,0.2); }}
-.player .info {{ background: #f0f4ff; padding: 0.75rem 1rem; border-radius: 6px; flex: 1; }}
-small {{ color: #3366cc; display: block; margin-top: 0.5rem; word-break: break-all; }}
-</style>
-</head>
-<body>
-<h1>Pokemon TCG Replay</h1>
-{joined}
-</body>
-</html>"""
+    def _prefetch(self, snapshots: Sequence[GameSnapshot]) -> None:
+        """Resolve every referenced card in one batch so rendering never waits on the network."""
+
+        self.resolver.bulk_resolve(
+            player.active_external_id
+            for snapshot in snapshots
+            for player in snapshot.players.values()
+            if player.active_external_id is not None
+        )
+
+    def _write_document(self, fp: TextIO, snapshots: Sequence[GameSnapshot]) -> None:
+        """Stream the whole document to ``fp`` section by section."""
 
-    def _render_snapshot(self, index: int, snapshot: GameSnapshot) -> str:
-        turn_label = escape(snapshot.active_turn.name)
-        header = f"<h2>ステップ {index}: Turn {snapshot.turn_count} ({turn_label})</h2>"
-        description = f"<p>{escape(snapshot.description)}</p>"
-        players_html = "".join(self._render_player(player) for player in self._players_in_order(snapshot))
-        return f"<section>{header}{description}{players_html}</section>"
+        fp.write(_PROLOGUE)
+        for index, snapshot in enumerate(snapshots, start=1):
+            if index > 1:
+                fp.write("\n")
+            self._write_snapshot(fp, index, snapshot)
+        fp.write(_EPILOGUE)
 
-    def _players_in_order(self, snapshot: GameSnapshot) -> Iterable[PlayerSnapshot]:
-        yield snapshot.players[Turn.PLAYER_ONE]
-        yield snapshot.players[Turn.PLAYER_TWO]
+    def _write_snapshot(self, buf: TextIO, index: int, snapshot: GameSnapshot) -> None:
+        if self.snapshot_cache_size <= 0:
+            self._render_snapshot(buf, index, snapshot)
+            return
+        cache = self._snapshot_cache
+        key = (id(snapshot), index)
+        version = self.resolver.version
+        cached = cache.get(key)
+        if cached is not None and cached[0] is snapshot and cached[1] == version:
+            cache.move_to_end(key)
+            buf.write(cached[2])
+            return
+        part = StringIO()
+        self._render_snapshot(part, index, snapshot)
+        html = part.getvalue()
+        cache[key] = (snapshot, version, html)
+        cache.move_to_end(key)
+        while len(cache) > self.snapshot_cache_size:
+            cache.popitem(last=False)
+        buf.write(html)
 
-    def _render_player(self, player: PlayerSnapshot) -> str:
-        stats = (
-            f"手札 {player.hand_size} / 山札 {player.deck_size} / トラッシュ {player.discard_size} / サイド {player.prizes_remaining}"
+    def _render_snapshot(self, buf: TextIO, index: int, snapshot: GameSnapshot) -> None:
+        buf.write(
+            _SNAPSHOT_HEADER_TEMPLATE.format(
+                index=index,
+                turn_count=snapshot.turn_count,
+                turn_label=_esc(snapshot.active_turn.name),
+                description=escape(snapshot.description),
+            )
         )
+        player_one, player_two = self._players_in_order(snapshot)
+        self._write_player(buf, player_one)
+        self._write_player(buf, player_two)
+        buf.write("</section>")
+
+    def _players_in_order(self, snapshot: GameSnapshot) -> Tuple[PlayerSnapshot, PlayerSnapshot]:
+        return (snapshot.players[Turn.PLAYER_ONE], snapshot.players[Turn.PLAYER_TWO])
+
+    def _write_player(self, buf: TextIO, player: PlayerSnapshot) -> None:
         active_name = player.active_name or "バトル場なし"
         active_hp = f"HP {player.active_hp}" if player.active_name else ""
         metadata = self._resolve_metadata(player.active_external_id)
-        image_html = self._render_image(metadata)
-        reference_html = self._render_reference(metadata)
-        return (
-            "<div class=\"player\">"
-            f"{image_html}"
-            "<div class=\"info\">"
-            f"<strong>{escape(player.name)}</strong><br />"
-            f"{escape(active_name)} {escape(active_hp)}<br />"
-            f"<span>{escape(stats)}</span>"
-            f"{reference_html}"
-            "</div>"
-            "</div>"
-        )
-
-    def _render_image(self, metadata: RemoteCard | None) -> str:
         if metadata is None:
-            return "<div class=\"placeholder\">画像なし</div>"
-        return f"<img src=\"{escape(metadata.image_url)}\" alt=\"{escape(metadata.name)}\" />"
-
-    def _render_reference(self, metadata: RemoteCard | None) -> str:
-        if metadata is None:
-            return ""
-        return f"<small>参照: <a href=\"{escape(metadata.detail_url)}\" target=\"_blank\" rel=\"noopener\">{escape(metadata.detail_url)}</a></small>"
+            image, reference = _PLACEHOLDER_IMAGE, ""
+        else:
+            image = _IMAGE_TEMPLATE.format(image_url=metadata.image_url, name=metadata.name)
+            reference = _REFERENCE_TEMPLATE.format(detail_url=metadata.detail_url)
+        buf.write(
+            _PLAYER_TEMPLATE.format(
+                image=image,
+                name=_esc(player.name),
+                active_name=_esc(active_name),
+                active_hp=active_hp,
+                hand_size=player.hand_size,
+                deck_size=player.deck_size,
+                discard_size=player.discard_size,
+                prizes_remaining=player.prizes_remaining,
+                reference=reference,
+            )
+        )
 
-    def _resolve_metadata(self, card_id: int | None) -> RemoteCard | None:
+    def _resolve_metadata(self, card_id: int | None) -> EscapedCard | None:
         if card_id is None:
             return None
-        return self.resolver.resolve(card_id)
+        return self.resolver.resolve_escaped(card_id)
 
 
-__all__ = ["CardMetadataResolver", "GameVisualizer"]
+__all__ = ["CardMetadataResolver", "EscapedCard", "GameVisualizer"]
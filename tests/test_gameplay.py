@@ -1,4 +1,9 @@
-from poketcg import Attack, Deck, Player, PokemonCard, PokemonGame
+import json
+
+import pytest
+
+from poketcg import Attack, Deck, EnergyCard, Player, PokemonCard, PokemonGame, TrainerCard
+from poketcg.game import REPLAY_FORMAT, Turn
 
 
 def build_linear_deck(prefix: str, hp: int, damage: int) -> Deck:
@@ -6,6 +11,17 @@ def build_linear_deck(prefix: str, hp: int, damage: int) -> Deck:
     return Deck.from_iterable([card] * 60)
 
 
+def build_game(**kwargs) -> PokemonGame:
+    """Seeded game between the two linear decks that player one wins."""
+
+    kwargs.setdefault("seed", 1)
+    return PokemonGame(
+        Player("Player 1", build_linear_deck("P1", hp=60, damage=30)),
+        Player("Player 2", build_linear_deck("P2", hp=50, damage=20)),
+        **kwargs,
+    )
+
+
 def test_basic_game_flow():
     deck_one = build_linear_deck("P1", hp=60, damage=30)
     deck_two = build_linear_deck("P2", hp=50, damage=20)
@@ -17,10 +33,146 @@ def test_basic_game_flow():
     result = game.play(max_turns=40)
 
     assert result.winner is not None
-    assert game.players[result.winner].name == "Player 1"
+    assert game.player(result.winner).name == "Player 1"
     assert any("takes the final prize" in line for line in result.log)
     assert result.snapshots
     assert result.snapshots[0].description == "Setup complete"
     assert result.snapshots[-1].description == "Game end"
     for snapshot in result.snapshots:
         assert snapshot.players
+
+
+def test_clone_does_not_share_log_writes():
+    game = build_game()
+    game.setup()
+    clone = game.clone()
+    history = list(game.log)
+
+    clone.step()
+
+    assert game.log == history
+    assert clone.log[: len(history)] == history
+    assert len(clone.log) > len(history)
+
+
+def test_disabled_log_keeps_outcome():
+    logged = build_game(log_enabled=True).play(max_turns=40)
+    silent = build_game(log_enabled=False).play(max_turns=40)
+
+    assert silent.winner == logged.winner
+    assert silent.log == ()
+    assert len(silent.snapshots) == len(logged.snapshots)
+
+
+def test_snapshot_timeline_rejects_out_of_range_indices():
+    snapshots = build_game().play(max_turns=40).snapshots
+
+    assert snapshots[-len(snapshots)] is snapshots[0]
+    with pytest.raises(IndexError):
+        snapshots[-len(snapshots) - 1]
+    with pytest.raises(IndexError):
+        snapshots[len(snapshots)]
+
+
+def test_recorded_game_replays_identically(tmp_path):
+    game = build_game()
+    fingerprint = game.fingerprint(max_turns=40)
+    path = tmp_path / "replay.json"
+    recorded = game.record(path, max_turns=40)
+
+    assert build_game().fingerprint(max_turns=40) == fingerprint
+    replayed = PokemonGame.replay(path, fingerprint=fingerprint)
+    assert replayed.winner == recorded.winner
+    assert replayed.log == recorded.log
+    assert list(replayed.snapshots) == list(recorded.snapshots)
+
+
+def test_fingerprint_tracks_engine_source(monkeypatch):
+    original = build_game().fingerprint(max_turns=40)
+    monkeypatch.setattr("poketcg.game._rules_digest", lambda: "changed rules")
+    assert build_game().fingerprint(max_turns=40) != original
+
+
+def test_defender_without_replacement_loses_that_turn():
+    energy = EnergyCard(name="Lightning Energy", energy_type="lightning")
+    attacker = Player(
+        "Player 1",
+        Deck.from_iterable([energy] * 10),
+        prizes=[energy] * 6,
+        active_pokemon=PokemonCard(name="Raichu", hp=90, attacks=[Attack(name="Hit", damage=50)]),
+        active_hp=90,
+    )
+    defender = Player(
+        "Player 2",
+        Deck.from_iterable([energy] * 10),
+        hand=[energy, TrainerCard(name="Potion", text="Heal 30 damage.")],
+        prizes=[energy] * 6,
+        active_pokemon=PokemonCard(name="Pichu", hp=30, attacks=[Attack(name="Hit", damage=10)]),
+        active_hp=30,
+    )
+    game = PokemonGame(attacker, defender, seed=1)
+
+    assert game.step() is Turn.PLAYER_ONE
+    assert game.turn_count == 1
+    assert game.log[-1] == "Player 2 has no replacement Pokemon and loses!"
+    assert not any("final prize" in line for line in game.log)
+    assert len(attacker.prizes) == 5
+
+
+def test_promotion_skips_non_pokemon_cards_in_hand():
+    energy = EnergyCard(name="Lightning Energy", energy_type="lightning")
+    trainer = TrainerCard(name="Potion", text="Heal 30 damage.")
+    pichu = PokemonCard(name="Pichu", hp=30)
+    pikachu = PokemonCard(name="Pikachu", hp=60)
+    raichu = PokemonCard(name="Raichu", hp=90)
+    eevee = PokemonCard(name="Eevee", hp=50)
+    player = Player(
+        "Player 1",
+        Deck.from_iterable([energy, pichu, trainer, pikachu, raichu, energy]),
+        prizes=[eevee, energy],
+    )
+
+    player.draw_into_hand(3)
+    player.draw()
+    assert player.hand == [energy, pichu, trainer, pikachu]
+    clone = PokemonGame(player, Player("Player 2", build_linear_deck("P2", hp=50, damage=20))).clone().players[0]
+
+    assert player.promote_from_hand()
+    assert player.active_pokemon is pichu
+    assert player.hand == [energy, trainer, pikachu]
+    assert player.take_prize() is eevee
+    player.draw(2)
+    assert player.hand == [energy, trainer, pikachu, eevee, raichu, energy]
+
+    promoted = []
+    while player.has_pokemon_in_hand():
+        assert player.promote_from_hand()
+        promoted.append(player.active_pokemon)
+    assert promoted == [pikachu, eevee, raichu]
+    assert player.hand == [energy, trainer, energy]
+    assert not player.promote_from_hand()
+
+    # The clone indexes its own copy of the hand and is unaffected by the above.
+    assert clone.hand == [energy, pichu, trainer, pikachu]
+    assert clone.promote_from_hand() and clone.active_pokemon is pichu
+    assert clone.promote_from_hand() and clone.active_pokemon is pikachu
+    assert clone.hand == [energy, trainer]
+    assert not clone.has_pokemon_in_hand()
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        [],
+        {"format": REPLAY_FORMAT, "winner": None, "log": [], "snapshots": [{"active_turn": 5}]},
+        {"format": REPLAY_FORMAT, "winner": 2, "log": [], "snapshots": []},
+        {"format": REPLAY_FORMAT, "winner": None, "log": [], "snapshots": ["not a snapshot"]},
+    ],
+    ids=["list", "turn-out-of-range", "winner-out-of-range", "snapshot-not-object"],
+)
+def test_malformed_replay_raises_value_error(tmp_path, payload):
+    path = tmp_path / "replay.json"
+    path.write_text(json.dumps(payload), encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        PokemonGame.replay(path)
@@ -16,6 +16,9 @@ class DummyClient:
             image_url=f"https://example.com/{card_id}.png",
         )
 
+    def fetch_many(self, card_ids):
+        return {card_id: self.fetch(card_id) for card_id in card_ids}
+
 
 def test_visualizer_renders_without_errors(tmp_path):
     client = DummyClient()
@@ -60,3 +63,102 @@ def test_visualizer_renders_without_errors(tmp_path):
     html = output.read_text(encoding="utf-8")
     assert "https://example.com/111.png" in html
     assert client.calls == [111]
+
+
+def test_resolver_persists_cards_between_instances(tmp_path):
+    cache_path = tmp_path / "metadata.json"
+
+    first = CardMetadataResolver(client=DummyClient(), cache_path=cache_path)
+    card = first.resolve(222)
+    first.flush()
+
+    client = DummyClient()
+    second = CardMetadataResolver(client=client, cache_path=cache_path)
+    assert second.resolve(222) == card
+    assert client.calls == []
+
+
+def test_visualizer_reuses_rendered_snapshots(tmp_path, monkeypatch):
+    player = PlayerSnapshot(
+        name="Alice",
+        deck_size=40,
+        hand_size=5,
+        discard_size=0,
+        prizes_remaining=6,
+        active_name="Card 111",
+        active_hp=60,
+        active_external_id=111,
+    )
+    snapshots = [
+        GameSnapshot(
+            active_turn=Turn.PLAYER_ONE,
+            turn_count=1,
+            description="After turn 1",
+            players={Turn.PLAYER_ONE: player, Turn.PLAYER_TWO: player},
+        )
+    ]
+    visualizer = GameVisualizer(CardMetadataResolver(client=DummyClient()))
+    first = visualizer.render_html(snapshots, tmp_path / "first.html").read_text(encoding="utf-8")
+
+    def fail(*args):
+        raise AssertionError("snapshot should have been served from the cache")
+
+    monkeypatch.setattr(visualizer, "_render_snapshot", fail)
+    second = visualizer.render_html(snapshots, tmp_path / "second.html").read_text(encoding="utf-8")
+    assert second == first
+
+
+def test_resolver_retries_failed_lookups_on_next_batch():
+    class FlakyClient:
+        """Client without ``fetch_many`` whose first lookup of each id fails."""
+
+        def __init__(self):
+            self.calls = []
+
+        def fetch(self, card_id: int) -> RemoteCard:
+            self.calls.append(card_id)
+            if self.calls.count(card_id) == 1:
+                raise ValueError("temporary failure")
+            return DummyClient().fetch(card_id)
+
+    client = FlakyClient()
+    resolver = CardMetadataResolver(client=client)
+
+    resolver.bulk_resolve([333])
+    assert resolver.resolve(333) is None
+    assert client.calls == [333]
+
+    resolver.bulk_resolve([333])
+    assert resolver.resolve(333).name == "Card 333"
+    assert client.calls == [333, 333]
+
+
+def test_snapshot_cache_is_bounded(tmp_path):
+    player = PlayerSnapshot(
+        name="Alice",
+        deck_size=40,
+        hand_size=5,
+        discard_size=0,
+        prizes_remaining=6,
+        active_name=None,
+        active_hp=0,
+        active_external_id=None,
+    )
+    snapshots = [
+        GameSnapshot(
+            active_turn=Turn.PLAYER_ONE,
+            turn_count=turn,
+            description=f"After turn {turn}",
+            players={Turn.PLAYER_ONE: player, Turn.PLAYER_TWO: player},
+        )
+        for turn in range(1, 4)
+    ]
+
+    bounded = GameVisualizer(CardMetadataResolver(client=DummyClient()), snapshot_cache_size=2)
+    bounded.render_html(snapshots, tmp_path / "bounded.html")
+    assert [cached[0] for cached in bounded._snapshot_cache.values()] == snapshots[1:]
+
+    uncached = GameVisualizer(CardMetadataResolver(client=DummyClient()), snapshot_cache_size=0)
+    uncached.render_html(snapshots, tmp_path / "uncached.html")
+    assert not uncached._snapshot_cache
+    assert (tmp_path / "uncached.html").read_text(encoding="utf-8") == (tmp_path / "bounded.html").read_text(encoding="utf-8")